@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
 
-import math
-from pytz import timezone
-from datetime import datetime
+import struct
+import time
+from binascii import hexlify
+from collections import namedtuple
 
 
 TRANSACTION_TYPE = {
@@ -16,70 +17,255 @@ TRANSACTION_TYPE = {
     'mosaic_supply_change': 0x4002
 }
 
+# --- TODO --- main状態でのbyte文字列を確認.
+NETWORK_VERSION = {
+    'main': 0x68 << 24,
+    'test': 0x98 << 24
+}
+
+# Version for every (transaction type, network type) pair.
+VERSION = {
+    (transaction_type, network_type): network_version + (
+        2 if transaction_type in ('transfer',
+                                  'multisig_aggregate_modification')
+        else 1)
+    for transaction_type in TRANSACTION_TYPE
+    for network_type, network_version in NETWORK_VERSION.items()
+}
+
+MESSAGE_TYPE = {
+    'plane': 1,
+    'encryption': 2
+}
+
+MessageInfo = namedtuple(
+    'MessageInfo',
+    ['message_field', 'message_type', 'payload_length', 'payload'])
+
+MICRONEM = 1000000
+
+# 2015-03-29 00:06:25 UTC (NEM nemesis block) as unix time.
+NEM_EPOCH = 1427587585
+DEADLINE_SPAN = 3600
+
+PUBLIC_KEY_LENGTH = 32
+ADDRESS_LENGTH = 40
+
+# transaction type, version, timestamp, public key length, public key,
+# fee, deadline
+COMMON_STRUCT = struct.Struct('<IIII32sQI')
+# address length, address, amount, message field length
+TRANSFER_STRUCT = struct.Struct('<I40sQI')
+# common data followed by transfer data
+TRANSACTION_STRUCT = struct.Struct(
+    COMMON_STRUCT.format + TRANSFER_STRUCT.format[1:])
+# message type, payload length
+MESSAGE_STRUCT = struct.Struct('<II')
+
+
+def convert_public_key(public_key):
+    """ Convert public key from hex string to byte.
+    [Input]
+        public key : string
+    [Output]
+        public key : 32 byte value.
+    """
+    public_key_bytes = bytes.fromhex(public_key)
+    if len(public_key_bytes) != PUBLIC_KEY_LENGTH:
+        msg = 'Invalid public key. Public key must be %d bytes!' \
+            % PUBLIC_KEY_LENGTH
+        raise ValueError(msg)
+    return public_key_bytes
+
+
+def convert_address(address):
+    """ Convert address to byte.
+    Dashes are removed and letters are upper-cased.
+    [Input]
+        address : string
+    [Output]
+        address : 40 byte, utf-8 encoded
+    """
+    address_bytes = address.replace('-', '').upper().encode('utf-8')
+    if len(address_bytes) != ADDRESS_LENGTH:
+        msg = 'Invalid address. Address must be %d characters!' \
+            % ADDRESS_LENGTH
+        raise ValueError(msg)
+    return address_bytes
+
+
+def convert_amount(amount):
+    """ Convert amount to micro num.
+    [Input]
+        amount : xem
+    [Output]
+        amount : number, microxem
+    """
+    if isinstance(amount, int):
+        return amount * MICRONEM
+    return round(amount * MICRONEM)
+
+
+def calc_version(transaction_type, network_type):
+    """ Get version with transaction_type and network_type.
+    [Input]
+        transaction_type : string
+        network_type : string
+    [Output]
+        version : number
+    """
+    network_type = 'main' if network_type == 'main' else 'test'
+    return VERSION[(transaction_type, network_type)]
+
+
+# --- TODO --- 料金の計算方法が変わっているようなので、チェック.
+def calc_fee_microxem(amount, payload_length=None):
+    """ Calculate comission for amount.
+    [Input]
+        amount : number
+        payload length : number, None if there is no message
+    [Output]
+        fee : number, microxem
+    """
+    # All fees are multiples of 0.05 xem, so compute in microxem ints.
+    fee_unit = 50000
+    minimum_units = 1
+    maximum_units = 25
+    base_amount = 10000
+    base_message_size = 32
+
+    transfer_units = int(amount // base_amount)
+    transfer_units = min(transfer_units, maximum_units)
+    transfer_units = max(transfer_units, minimum_units)
+
+    if payload_length is None:
+        message_units = 0
+    else:
+        message_units = 1 + payload_length // base_message_size
+
+    return (transfer_units + message_units) * fee_unit
+
+
+def calc_nem_timestamp():
+    """ Caluculation timestamp of UTC time zone.
+    Seconds elapsed since NEM_EPOCH.
+    """
+    return int(time.time()) - NEM_EPOCH
+
+
+# --- TODO --- メッセージの扱いがドキュメント読んでもイマイチ分かりきってない.
+# --- TODO --- バイト数の計算方法
+def build_message_info(message, message_type):
+    """ Get message infomations.
+    [Input]
+        message : string
+        message type : string (plane or encryption)
+    [Output]
+        MessageInfo
+            message field length : number
+            message type : number
+            payload length : number, utf-8 byte length of message
+            payload : hex encoded utf-8 message (2 * payload length)
+    """
+    if message_type not in MESSAGE_TYPE:
+        msg = 'Invalid message type. Select plane or encryption!'
+        raise Exception(msg)
+
+    encoded = message.encode('utf-8')
+    payload = hexlify(encoded)
+    payload_length = len(encoded)
+    message_field = 4 + 4 + payload_length
+    return MessageInfo(
+        message_field, MESSAGE_TYPE[message_type], payload_length, payload)
+
+
+def calc_transaction_size(message_info=None):
+    """ Calculate byte length of transaction.
+    [Input]
+        message_info : MessageInfo or None
+    [Output]
+        size : number
+    """
+    size = TRANSACTION_STRUCT.size
+    if message_info:
+        size += MESSAGE_STRUCT.size + len(message_info.payload)
+    return size
+
+
+def pack_transaction(data, offset, transaction_type, version, now,
+                     public_key, fee, deadline, address, amount,
+                     message_info=None):
+    """ Write transaction into buffer.
+    [Input]
+        data : bytearray
+        offset : number
+        transaction_type, version : number
+        now, deadline : timestamp
+        public_key : 32 byte
+        fee, amount : number, microxem
+        address : 40 byte
+        message_info : MessageInfo or None
+    [Output]
+        offset : number, end of written transaction
+    """
+    message_field = message_info.message_field if message_info else 0
+    TRANSACTION_STRUCT.pack_into(
+        data, offset,
+        transaction_type,
+        version,
+        now,
+        PUBLIC_KEY_LENGTH,
+        public_key,
+        fee,
+        deadline,
+        ADDRESS_LENGTH,
+        address,
+        amount,
+        message_field)
+    offset += TRANSACTION_STRUCT.size
+
+    if message_info:
+        payload = message_info.payload
+        MESSAGE_STRUCT.pack_into(
+            data, offset,
+            message_info.message_type, message_info.payload_length)
+        offset += MESSAGE_STRUCT.size
+        data[offset:offset+len(payload)] = payload
+        offset += len(payload)
+    return offset
+
 
 class TransactionCreator:
 
     def __init__(self, public_key, amount, address,
                  message=None, message_type='plane',
                  transaction_type='transfer', network_type='test'):
-        self.nem_to_micronem = 1000000.0
-        self.deadline_span = 3600
+        self.deadline_span = DEADLINE_SPAN
         self.public_key = public_key
+        self.public_key_bytes = convert_public_key(public_key)
         self.amount = amount
         self.address = address
+        self.address_bytes = convert_address(address)
         self.message = message
         self.message_type = message_type
         self.transaction_type = transaction_type
         self.network_type = network_type
-        self.common_data = b''
-        self.transfer_data = b''
 
-    # --- TODO --- メッセージの扱いがドキュメント読んでもイマイチ分かりきってない.
-    # --- TODO --- バイト数の計算方法
-    def set_message_info(self):
+    def get_message_info(self):
         """ Get message infomations.
-        [Input]
-            message : string
         [Output]
-            message field length : 4 byte
-            message type : 4 byte (plane or encryption)
-            payload length : 4 byte
-            payload : utf-8 string
-        """
-        if self.message_type == 'plane':
-            self.message_type = self.convert_number_to_byte(1, byte_num=4)
-        elif self.message_type == 'encryption':
-            self.message_type = self.convert_number_to_byte(2, byte_num=4)
-        else:
-            msg = 'Invalid message type. Select plane or encryption!'
-            raise Exception(msg)
-
-        self.payload = self.message.encode('utf-8').hex().encode('utf-8')
-        payload_length = int(len(self.payload)/2)
-        self.message_field = \
-            self.convert_number_to_byte(4+4+payload_length, byte_num=4)
-        self.payload_length = \
-            self.convert_number_to_byte(payload_length, byte_num=4)
-
-    def convert_number_to_byte(self, value, byte_num=4):
-        """ Convert values from number to byte.
-        [Input]
-            value : hexadecimal
-            byte_num : number
-        [output]
-            converted value : hexadecimal and byte type
+            MessageInfo (see build_message_info)
         """
-        return value.to_bytes(byte_num, 'little')
+        return build_message_info(self.message, self.message_type)
 
     def get_transaction_type(self):
-        """ Convert transaction type from string to byte.
+        """ Convert transaction type from string to number.
         [Input]
             transaction type : string
         [Output]
-            transaction type value : 4 byte
+            transaction type value : number
         """
-        value = TRANSACTION_TYPE[self.transaction_type]
-        return self.convert_number_to_byte(value, byte_num=4)
+        return TRANSACTION_TYPE[self.transaction_type]
 
     def get_version(self):
         """ Get version with transaction_type and network_type.
@@ -87,157 +273,142 @@ class TransactionCreator:
             transaction_type : string
             network_type : string
         [Output]
-            version : 4 byte
+            version : number
         """
-        # --- TODO --- main状態でのbyte文字列を確認.
-        if self.network_type == 'main':
-            version = 0x68 << 24
-        else:
-            version = 0x98 << 24
-
-        transaction_types = ['transfer', 'multisig_aggregate_modification']
-        if self.transaction_type in transaction_types:
-            version += 2
-        else:
-            version += 1
-
-        return self.convert_number_to_byte(version, byte_num=4)
-
-    # --- TODO ---- 32が出力では「b' \x00\x00\x00'」となるが問題ないか.
-    def get_publickey_length(self):
-        """ Get length of public key.
-        Length is constant value(32).
-        """
-        return self.convert_number_to_byte(32, byte_num=4)
+        return calc_version(self.transaction_type, self.network_type)
 
     def calc_utc_timestamp(self):
         """ Caluculation timestamp of UTC time zone.
+        Seconds elapsed since NEM_EPOCH.
         """
-        origin_time = datetime(2015, 3, 29, 0, 6, 25, 0, timezone('UTC'))
-        utc_now = datetime.now(timezone('UTC'))
-
-        delta = utc_now - origin_time
-        delta = int(delta.total_seconds())
-        return delta
+        return calc_nem_timestamp()
 
-    def get_timestamp(self):
-        """ Get timestamp.
-        Use UTC timezone.
-        """
-        now = self.calc_utc_timestamp()
-        return self.convert_number_to_byte(now, byte_num=4)
-
-    # --- TODO --- public keyを数値として扱うのか、文字列として扱うのか調査.
     def get_publickey(self):
-        """ Convert public key from string to byte.
-        [Input]
-            public key : string
+        """ Get public key as byte.
+        Converted from hex string once in __init__.
         [Output]
             public key : 32 byte value.
         """
-        key = int(self.public_key, 16)
-        return self.convert_number_to_byte(key, byte_num=32)
+        return self.public_key_bytes
 
-    # --- TODO --- 料金の計算方法が変わっているようなので、チェック.
-    def calc_fee(self):
+    def calc_fee(self, payload_length=None):
         """ Calculate comission for amount.
         [Input]
             amount : number
+            payload length : number, None if there is no message
         [Output]
-            fee : number
+            fee : number, microxem
         """
-        minimum_fee = 0.05
-        maximum_fee = 1.25
-        base_amount = 10000
-        fee_per_base_amount = 0.05
-        base_message_size = 32
-        fee_per_base_message = 0.05
-
-        transfer_fee = int(self.amount/base_amount) * fee_per_base_amount
-        transfer_fee = min(transfer_fee, maximum_fee)
-        transfer_fee = max(transfer_fee, minimum_fee)
-
-        if not self.message:
-            message_fee = 0
-        else:
-            payload_length = int(len(self.payload)/2)
-            message_fee = fee_per_base_message * \
-                (1 + int(payload_length/base_message_size))
+        return calc_fee_microxem(self.amount, payload_length)
 
-        fee = (transfer_fee + message_fee) * self.nem_to_micronem
-        return self.convert_number_to_byte(int(fee), byte_num=8)
-
-    def get_deadline(self):
+    def get_deadline(self, now):
         """ Get deadline time. (UTC timezone)
         [Input]
+            now : timestamp
             deadline span : second
         [Output]
             deadline : timestamp
         """
-        now = self.calc_utc_timestamp()
-        deadline = now + self.deadline_span
-        return self.convert_number_to_byte(deadline, byte_num=4)
-
-    def get_address_length(self):
-        """ Get length of address.
-        Length is constant value(40).
-        """
-        return self.convert_number_to_byte(40, byte_num=4)
+        return now + self.deadline_span
 
     def get_address(self):
-        """ Convert address to utf-8
-        [Input]
-            address : string
+        """ Get address as byte.
+        Converted from string once in __init__.
         [Output]
             address : utf-8 encoded
         """
-        return self.address.encode('utf-8').hex().encode('utf-8')
+        return self.address_bytes
 
     def get_amount(self):
         """ Convert amount to micro num.
         [Input]
             amount : xem
         [Output]
-            amount : 8 byte, microxem
+            amount : number, microxem
         """
-        amount = int(self.amount * self.nem_to_micronem)
-        return self.convert_number_to_byte(amount, byte_num=8)
+        return convert_amount(self.amount)
 
     def run(self):
         """ Main function.
         Step.1 Get message length if exist.
-        Step.2 Set common_data.
-        Step.3 Set transfer_data.
-        Step.4 Join common and transfer data.
+        Step.2 Allocate buffer.
+        Step.3 Pack common and transfer data.
         """
 
         # Step.1
         if self.message:
-            self.set_message_info()
+            message_info = self.get_message_info()
+            payload_length = message_info.payload_length
         else:
-            self.message_field = self.convert_number_to_byte(0, byte_num=4)
+            message_info, payload_length = None, None
 
         # Step.2
-        self.common_data += self.get_transaction_type()
-        self.common_data += self.get_version()
-        self.common_data += self.get_timestamp()
-        self.common_data += self.get_publickey_length()
-        self.common_data += self.get_publickey()
-        self.common_data += self.calc_fee()
-        self.common_data += self.get_deadline()
+        data = bytearray(calc_transaction_size(message_info))
 
         # Step.3
-        self.transfer_data += self.get_address_length()
-        self.transfer_data += self.get_address()
-        self.transfer_data += self.get_amount()
-        self.transfer_data += self.message_field
-        if self.message:
-            self.transfer_data += self.message_type
-            self.transfer_data += self.payload_length
-            self.transfer_data += self.payload
+        now = self.calc_utc_timestamp()
+        pack_transaction(
+            data, 0,
+            self.get_transaction_type(),
+            self.get_version(),
+            now,
+            self.get_publickey(),
+            self.calc_fee(payload_length),
+            self.get_deadline(now),
+            self.get_address(),
+            self.get_amount(),
+            message_info)
+        return bytes(data)
+
+    @classmethod
+    def build_many(cls, rows, message_type='plane',
+                   transaction_type='transfer', network_type='test'):
+        """ Build many transactions into a single buffer.
+        Fields shared by every row (transaction type, version, timestamp,
+        deadline) are calculated once for the batch.
+        [Input]
+            rows : list of (public_key, amount, address[, message])
+            message_type : string (plane or encryption)
+            transaction_type : string
+            network_type : string
+        [Output]
+            data : bytearray, transactions back to back
+            offsets : list of number,
+                transaction i is data[offsets[i]:offsets[i+1]]
+        """
+        version = calc_version(transaction_type, network_type)
+        transaction_type = TRANSACTION_TYPE[transaction_type]
+        now = calc_nem_timestamp()
+        deadline = now + DEADLINE_SPAN
+
+        # Step.1 Convert rows and calculate offsets.
+        records = []
+        offsets = [0]
+        size = 0
+        for row in rows:
+            message = row[3] if len(row) > 3 else None
+            if message:
+                message_info = build_message_info(message, message_type)
+                fee = calc_fee_microxem(row[1], message_info.payload_length)
+            else:
+                message_info = None
+                fee = calc_fee_microxem(row[1])
+            records.append((
+                convert_public_key(row[0]), fee, convert_address(row[2]),
+                convert_amount(row[1]), message_info))
+            size += calc_transaction_size(message_info)
+            offsets.append(size)
+
+        # Step.2 Pack every row into one buffer.
+        data = bytearray(size)
+        for (public_key, fee, address, amount, message_info), start in \
+                zip(records, offsets):
+            pack_transaction(
+                data, start, transaction_type, version, now,
+                public_key, fee, deadline, address, amount, message_info)
+
+        return data, offsets
 
-        # Step. 4
-        return self.common_data + self.transfer_data
 
 if __name__ == '__main__':
     # 12Xem
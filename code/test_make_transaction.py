@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+from make_transaction import NEM_EPOCH, VERSION, TransactionCreator, \
+    calc_transaction_size
+
+
+PUBLIC_KEY = bytes(range(32)).hex()
+ADDRESS = 'TALICELCD3XPH4FFI5STGGNSNSWPOTG5E4DS2TOS'
+
+
+class TestTimestamp(unittest.TestCase):
+
+    def test_timestamp_and_deadline(self):
+        # a second clock read would return a different time
+        clock = [NEM_EPOCH + 1000.7, NEM_EPOCH + 2000]
+        with mock.patch('make_transaction.time.time',
+                        side_effect=clock) as time:
+            data = TransactionCreator(PUBLIC_KEY, 12, ADDRESS).run()
+        self.assertEqual(time.call_count, 1)
+        self.assertEqual(data[8:12], (1000).to_bytes(4, 'little'))
+        self.assertEqual(data[56:60], (4600).to_bytes(4, 'little'))
+
+    def test_build_many_timestamp_and_deadline(self):
+        rows = [(PUBLIC_KEY, 12, ADDRESS), (PUBLIC_KEY, 12, ADDRESS)]
+        clock = [NEM_EPOCH + 1000.7, NEM_EPOCH + 2000]
+        with mock.patch('make_transaction.time.time',
+                        side_effect=clock) as time:
+            data, offsets = TransactionCreator.build_many(rows)
+        self.assertEqual(time.call_count, 1)
+        for offset in offsets[:-1]:
+            self.assertEqual(
+                data[offset+8:offset+12], (1000).to_bytes(4, 'little'))
+            self.assertEqual(
+                data[offset+56:offset+60], (4600).to_bytes(4, 'little'))
+
+
+class TestVersion(unittest.TestCase):
+
+    def test_version_table(self):
+        self.assertEqual(VERSION[('transfer', 'main')], 0x68000002)
+        self.assertEqual(VERSION[('transfer', 'test')], 0x98000002)
+        self.assertEqual(VERSION[('multisig', 'test')], 0x98000001)
+        self.assertEqual(
+            VERSION[('multisig_aggregate_modification', 'main')], 0x68000002)
+
+    def test_type_and_version_bytes(self):
+        cases = [
+            ('transfer', 'main', 0x0101, 0x68000002),
+            ('multisig', 'test', 0x1004, 0x98000001),
+            ('transfer', 'unknown', 0x0101, 0x98000002),
+        ]
+        for transaction_type, network_type, type_value, version in cases:
+            data = TransactionCreator(
+                PUBLIC_KEY, 12, ADDRESS, transaction_type=transaction_type,
+                network_type=network_type).run()
+            self.assertEqual(data[0:4], type_value.to_bytes(4, 'little'))
+            self.assertEqual(data[4:8], version.to_bytes(4, 'little'))
+
+
+class TestFee(unittest.TestCase):
+
+    def fee_bytes(self, amount, message=None):
+        data = TransactionCreator(
+            PUBLIC_KEY, amount, ADDRESS, message=message).run()
+        return data[48:56]
+
+    def test_transfer_fee(self):
+        cases = [
+            (0, 50000),
+            (12, 50000),
+            (10000, 50000),
+            (20000, 100000),
+            (250000, 1250000),
+            (10 ** 9, 1250000),
+        ]
+        for amount, fee in cases:
+            self.assertEqual(
+                self.fee_bytes(amount), fee.to_bytes(8, 'little'))
+
+    def test_message_fee(self):
+        cases = [
+            (31, 100000),
+            (32, 150000),
+            (64, 200000),
+        ]
+        for size, fee in cases:
+            self.assertEqual(
+                self.fee_bytes(12, 'x' * size), fee.to_bytes(8, 'little'))
+
+
+class TestAmount(unittest.TestCase):
+
+    def amount_bytes(self, amount):
+        data = TransactionCreator(PUBLIC_KEY, amount, ADDRESS).run()
+        return data[104:112]
+
+    def test_large_int_amount_is_exact(self):
+        amount = 9007199255
+        self.assertGreater(amount * 1000000, 2 ** 53)
+        self.assertEqual(
+            self.amount_bytes(amount),
+            (amount * 1000000).to_bytes(8, 'little'))
+
+    def test_float_amount_is_rounded(self):
+        cases = [
+            (0.1234567, 123457),
+            (2.01, 2010000),
+            (0.000001, 1),
+            (3.5, 3500000),
+        ]
+        for amount, microxem in cases:
+            self.assertEqual(
+                self.amount_bytes(amount), microxem.to_bytes(8, 'little'))
+
+
+class TestPublicKey(unittest.TestCase):
+
+    def test_public_key_byte_order(self):
+        data = TransactionCreator(PUBLIC_KEY, 12, ADDRESS).run()
+        self.assertEqual(data[12:16], (32).to_bytes(4, 'little'))
+        self.assertEqual(data[16:48], bytes(range(32)))
+
+    def test_invalid_public_key_length(self):
+        for public_key in ('aa' * 31 + 'bc' + 'ff', 'aa' * 31):
+            with self.assertRaises(ValueError):
+                TransactionCreator(public_key, 12, ADDRESS)
+
+
+class TestAddress(unittest.TestCase):
+
+    def test_transfer_layout(self):
+        data = TransactionCreator(PUBLIC_KEY, 12, ADDRESS).run()
+        self.assertEqual(len(data), 116)
+        self.assertEqual(data[60:64], (40).to_bytes(4, 'little'))
+        self.assertEqual(data[64:104], ADDRESS.encode('utf-8'))
+        self.assertEqual(data[104:112], (12000000).to_bytes(8, 'little'))
+        self.assertEqual(data[112:116], (0).to_bytes(4, 'little'))
+
+    def test_hyphenated_address(self):
+        creator = TransactionCreator(
+            PUBLIC_KEY, 12, 'tbci2a-67UQZA-KCR6NS-4JWAEI-CEIGEI-M72G3M-VW5S')
+        self.assertEqual(
+            creator.get_address(), b'TBCI2A67UQZAKCR6NS4JWAEICEIGEIM72G3MVW5S')
+
+    def test_invalid_address_length(self):
+        for address in ('SHORT', ADDRESS + 'A'):
+            with self.assertRaises(ValueError):
+                TransactionCreator(PUBLIC_KEY, 12, address)
+
+
+class TestMessage(unittest.TestCase):
+
+    def test_message_info(self):
+        creator = TransactionCreator(
+            PUBLIC_KEY, 12, ADDRESS, message='Hello NEM!')
+        info = creator.get_message_info()
+        self.assertEqual(info.message_type, 1)
+        self.assertEqual(info.payload_length, 10)
+        self.assertEqual(info.message_field, 4 + 4 + 10)
+        self.assertEqual(info.payload, b'48656c6c6f204e454d21')
+
+    def test_fee_uses_given_payload_length(self):
+        creator = TransactionCreator(
+            PUBLIC_KEY, 12, ADDRESS, message='Hello NEM!')
+        self.assertEqual(creator.calc_fee(), 50000)
+        self.assertEqual(creator.calc_fee(0), 100000)
+        self.assertEqual(creator.calc_fee(32), 150000)
+
+    def test_message_serialized_at_end(self):
+        creator = TransactionCreator(
+            PUBLIC_KEY, 12, ADDRESS, message='Hello NEM!')
+        data = creator.run()
+        self.assertTrue(data.endswith(
+            (1).to_bytes(4, 'little') + (10).to_bytes(4, 'little')
+            + b'48656c6c6f204e454d21'))
+        self.assertEqual(len(data), calc_transaction_size(
+            creator.get_message_info()))
+
+
+class TestBuildMany(unittest.TestCase):
+
+    def mask_time(self, data):
+        # timestamp and deadline
+        return data[:8] + data[12:56] + data[60:]
+
+    def test_same_as_run(self):
+        rows = [
+            (PUBLIC_KEY, 12, ADDRESS),
+            (PUBLIC_KEY, 500000, ADDRESS, 'Hello NEM!'),
+            ('ff' * 32, 3.5, ADDRESS.lower(), ''),
+            (PUBLIC_KEY, 12, ADDRESS, 'x' * 70),
+        ]
+        data, offsets = TransactionCreator.build_many(
+            rows, network_type='main')
+        self.assertEqual(len(offsets), len(rows) + 1)
+        self.assertEqual(offsets[-1], len(data))
+        for i, row in enumerate(rows):
+            expected = TransactionCreator(*row, network_type='main').run()
+            actual = bytes(data[offsets[i]:offsets[i+1]])
+            self.assertEqual(self.mask_time(actual), self.mask_time(expected))
+
+    def test_empty(self):
+        self.assertEqual(TransactionCreator.build_many([]), (bytearray(), [0]))
+
+    def test_invalid_row(self):
+        with self.assertRaises(ValueError):
+            TransactionCreator.build_many([(PUBLIC_KEY, 12, 'SHORT')])
+
+    def test_invalid_message_type_same_as_run(self):
+        row = (PUBLIC_KEY, 12, ADDRESS)
+        TransactionCreator(*row, message_type='other').run()
+        TransactionCreator.build_many([row], message_type='other')
+
+        row = (PUBLIC_KEY, 12, ADDRESS, 'Hello NEM!')
+        with self.assertRaises(Exception):
+            TransactionCreator(*row, message_type='other').run()
+        with self.assertRaises(Exception):
+            TransactionCreator.build_many([row], message_type='other')
+
+
+if __name__ == '__main__':
+    unittest.main()